@@ -2,105 +2,258 @@ import os
 import json
 import gspread
 import asyncio
-from playwright.async_api import async_playwright
-from oauth2client.service_account import ServiceAccountCredentials
-import re
+import contextlib
+import functools
+import string
 import sys # Adicionado para ler argumentos da linha de comando
+import time
+import traceback
 
-async def scrape_rawg_suggestions(game_title):
+USER_AGENT = (
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36'
+)
+
+# Quantidade máxima de páginas do RAWG abertas ao mesmo tempo
+MAX_CONCURRENT_SCRAPES = 6
+# Quantidade de jogos raspados entre cada gravação na planilha
+FLUSH_EVERY_N_GAMES = 25
+
+# Novas tentativas de gravação quando o Sheets recusa por cota (429). Só esse
+# erro garante que nada foi gravado; repetir após um 5xx poderia duplicar linhas.
+SHEETS_MAX_RETRIES = 5
+
+SIMILAR_GAMES_HEADER = ['Jogo Base', 'Jogo Similar', 'Plataformas', 'Metascore', 'URL']
+
+SUGGESTIONS_LIMIT = 60
+ALLOWED_PLATFORMS = ('playstation', 'pc')
+
+RAWG_API_URL = 'https://api.rawg.io/api'
+# Maior page_size aceito pela API do RAWG
+RAWG_API_PAGE_SIZE = 40
+RAWG_API_MAX_RETRIES = 3
+RAWG_API_RETRY_STATUS = {429, 502, 503, 504}
+
+# Cache em disco das sugestões já buscadas, reaproveitado entre execuções
+SUGGESTIONS_CACHE_PATH = '.rawg_cache.json'
+SUGGESTIONS_CACHE_TTL = 7 * 24 * 60 * 60  # 7 dias, em segundos
+
+# Perfil do Chromium mantido entre execuções, para que o cache HTTP guarde
+# os scripts e estilos do rawg.io de uma execução para a outra
+BROWSER_PROFILE_DIR = '.pw-cache'
+BROWSER_ARGS = [
+    '--disk-cache-size=104857600',  # 100 MB
+    # Sem GPU nem /dev/shm pequeno do container: evita travamentos e acelera a inicialização no CI
+    '--disable-gpu',
+    '--disable-dev-shm-usage',
+    # Imagens são bloqueadas pelo próprio Chromium: interceptar requisições
+    # com page.route desativaria o cache HTTP do navegador.
+    '--blink-settings=imagesEnabled=false',
+]
+
+# Domínios de rastreamento/anúncios carregados pelo rawg.io que não afetam
+# os cards. São bloqueados na resolução de DNS pelo mesmo motivo acima.
+BLOCKED_HOSTS = [
+    '*google-analytics.com',
+    '*googletagmanager.com',
+    '*doubleclick.net',
+    '*googlesyndication.com',
+    '*mc.yandex.ru',
+]
+BROWSER_ARGS.append(
+    '--host-resolver-rules=' + ', '.join(f'MAP {host} ~NOTFOUND' for host in BLOCKED_HOSTS)
+)
+
+# Janela alta: mais cards são renderizados a cada rolagem
+BROWSER_VIEWPORT = {'width': 1280, 'height': 2000}
+
+# Caracteres e tabelas usados para gerar slugs e comparar nomes, montados uma única vez
+_SLUG_ALLOWED = frozenset(string.ascii_lowercase + string.digits + '-')
+_NORMALIZE_TABLE = str.maketrans('', '', "':")
+
+# Tempo máximo (ms) esperando novos cards após cada rolagem
+SCROLL_WAIT_TIMEOUT = 5000
+
+# Espera até o primeiro card aparecer ou o tempo acabar, sem lançar erro:
+# retorna se algum card foi renderizado
+WAIT_FOR_FIRST_CARD_JS = """
+async waitTimeout => {
+    const hasCard = () => document.querySelector('div.game-card-large') !== null;
+    const deadline = Date.now() + waitTimeout;
+    while (!hasCard() && Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, 100));
+    }
+    return hasCard();
+}
+"""
+
+# Cards com Metascore e em pelo menos uma das plataformas permitidas: os
+# demais nunca saem do navegador
+USABLE_CARD_SELECTOR = (
+    'div.game-card-large:has(div.metascore-label):has('
+    + ', '.join(f'div.platforms__platform_{platform}' for platform in ALLOWED_PLATFORMS)
+    + ')'
+)
+
+# Rola a página inteira dentro do navegador: após cada rolagem espera até
+# novos cards aparecerem (ou o tempo acabar) e para quando há cards úteis
+# suficientes ou quando nada novo carrega. Uma única chamada ao Playwright por página.
+AUTO_SCROLL_JS = """
+async ({limit, usableSelector, waitTimeout}) => {
+    const countCards = () => document.querySelectorAll('div.game-card-large').length;
+    const countUsable = () => document.querySelectorAll(usableSelector).length;
+    const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+    let count = countCards();
+    let scrolls = 0;
+    while (countUsable() < limit) {
+        window.scrollTo(0, document.body.scrollHeight);
+        scrolls++;
+        const deadline = Date.now() + waitTimeout;
+        while (countCards() <= count && Date.now() < deadline) {
+            await sleep(100);
+        }
+        const newCount = countCards();
+        if (newCount <= count) break;
+        count = newCount;
+    }
+    return {count: countUsable(), scrolls};
+}
+"""
+
+# Monta, dentro do navegador, a linha final de cada card útil da página
+# (o seletor é recebido como argumento): [título, plataformas, metascore, url].
+# Cards sem link são descartados.
+EXTRACT_CARDS_JS = """
+usableSelector => Array.from(document.querySelectorAll(usableSelector)).flatMap(el => {
+    const link = el.querySelector('a.game-card-compact__heading_with-link');
+    const href = link && link.getAttribute('href');
+    if (!href || !link.innerText) {
+        return [];
+    }
+    const platforms = Array.from(el.querySelectorAll('div.platforms__platform'))
+        .map(p => p.className.split(' ').pop().replace('platforms__platform_', '').toUpperCase())
+        .join(', ');
+    return [[
+        link.innerText,
+        platforms,
+        el.querySelector('div.metascore-label').innerText,
+        'https://rawg.io' + href
+    ]];
+})
+"""
+
+def build_rawg_slug(game_title):
     """
-    Navega na página de sugestões de um jogo específico no RAWG.io,
-    e retorna até 30 títulos, plataformas, Metascore e URLs de jogos sugeridos.
+    Converte o nome do jogo no slug usado nas URLs do RAWG.
+    Retorna uma string vazia se o nome não tiver nenhuma letra ou número
+    aproveitável (ex.: só pontuação ou escrita não latina).
     """
     # --- NOVA LÓGICA: TRATAMENTO DE CASO ESPECÍFICO ---
     if game_title.lower() == 'forspoken':
-        game_url_slug = 'project-athia'
         print("Tratamento especial para 'Forspoken': usando slug 'project-athia'.")
-    else:
-        # Lógica original para tratar nomes de jogos
-        game_url_slug = re.sub(r"[':]", '', game_title.lower())
-        game_url_slug = re.sub(r'[\s]', '-', game_url_slug)
-        game_url_slug = re.sub(r'[^a-z0-9-]', '', game_url_slug)
-    
+        return 'project-athia'
+
+    # Lógica original para tratar nomes de jogos
+    # Uma única passada: espaços viram hífen e só [a-z0-9-] é mantido
+    # (aspas, dois-pontos e qualquer outro caractere são descartados)
+    game_url_slug = ''.join(
+        '-' if ch.isspace() else ch
+        for ch in game_title.lower()
+        if ch.isspace() or ch in _SLUG_ALLOWED
+    )
+
+    # Um slug só com hífens nunca existe no RAWG
+    return game_url_slug if game_url_slug.strip('-') else ''
+
+async def fetch_rawg_api_suggestions(client, game_title, game_url_slug):
+    """
+    Busca os jogos sugeridos diretamente na API JSON do RAWG, sem abrir o
+    navegador. Retorna a lista no mesmo formato de scrape_rawg_suggestions.
+    Se a API não puder responder por este jogo (ex.: 404 ou chave sem acesso
+    ao endpoint), o httpx.HTTPError é repassado para quem chamou tentar pelo
+    navegador.
+    """
+    url = f'{RAWG_API_URL}/games/{game_url_slug}/suggested'
+    print(f"Buscando sugestões para '{game_title}' na API: {url}")
+
+    # Limite de requisições (429) e falhas temporárias do servidor são
+    # repetidos com espera exponencial, respeitando o Retry-After se vier.
+    for attempt in range(RAWG_API_MAX_RETRIES + 1):
+        response = await client.get(url, params={'page_size': RAWG_API_PAGE_SIZE})
+        if response.status_code not in RAWG_API_RETRY_STATUS or attempt == RAWG_API_MAX_RETRIES:
+            break
+
+        retry_after = response.headers.get('Retry-After', '')
+        delay = int(retry_after) if retry_after.isdigit() else 0.5 * 2 ** attempt
+        print(f"API do RAWG respondeu {response.status_code} para '{game_title}'. Tentando de novo em {delay}s...")
+        await asyncio.sleep(delay)
+
+    response.raise_for_status()
+
+    suggestions_list = []
+    for game in response.json().get('results', []):
+        metascore = game.get('metacritic')
+        if metascore is None:
+            continue
+
+        platforms = [p['platform']['slug'] for p in game.get('parent_platforms') or []]
+        if not any(p in platforms for p in ALLOWED_PLATFORMS):
+            continue
+
+        suggestions_list.append((
+            game['name'],
+            ', '.join(p.upper() for p in platforms),
+            str(metascore),
+            f"https://rawg.io/games/{game['slug']}"
+        ))
+
+    return suggestions_list[:SUGGESTIONS_LIMIT]
+
+async def scrape_rawg_suggestions(context, game_title, game_url_slug):
+    """
+    Navega na página de sugestões de um jogo específico no RAWG.io,
+    e retorna até 30 títulos, plataformas, Metascore e URLs de jogos sugeridos,
+    como tuplas (título, plataformas, metascore, url) na ordem das colunas da planilha.
+    Usa o contexto de navegador compartilhado recebido de main(), abrindo
+    apenas uma nova aba por jogo.
+    """
     url = f'https://rawg.io/games/{game_url_slug}/suggestions'
     print(f"URL de busca gerada: {url}")
     
-    limit = 60
+    limit = SUGGESTIONS_LIMIT
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
+    page = await context.new_page()
 
+    try:
         print(f"Buscando sugestões para '{game_title}' em: {url}")
         await page.goto(url, wait_until='domcontentloaded')
 
-        try:
-            await page.wait_for_selector('div.game-suggestions__items', timeout=60000)
-            await page.wait_for_timeout(3000)
-            
-            last_height = await page.evaluate("document.body.scrollHeight")
-            scroll_count = 0
-            while True:
-                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                await page.wait_for_timeout(2000)
-                new_height = await page.evaluate("document.body.scrollHeight")
-                
-                scroll_count += 1
-                
-                if new_height == last_height or len(await page.query_selector_all('div.game-card-large')) >= limit:
-                    print(f"Rolagem finalizada após {scroll_count} iterações. Total de jogos carregados.")
-                    break
-                
-                last_height = new_height
-
-            game_elements = await page.query_selector_all('div.game-card-large')
-            
-            suggestions_list = []
-            allowed_platforms = ['playstation', 'pc']
-            
-            for element in game_elements:
-                try:
-                    platform_elements = await element.query_selector_all('div.platforms__platform')
-                    platforms = []
-                    for plat in platform_elements:
-                        class_attr = await plat.get_attribute('class')
-                        if class_attr:
-                            platform_name = class_attr.split(' ')[-1].replace('platforms__platform_', '')
-                            platforms.append(platform_name.lower())
-                    
-                    metascore_element = await element.query_selector('div.metascore-label')
-                    metascore = await metascore_element.inner_text() if metascore_element else 'N/A'
-                    
-                    if metascore == 'N/A':
-                        # print(f"Jogo ignorado por ter Metascore 'N/A'.") # Log opcional
-                        continue
-
-                    if not any(p in platforms for p in allowed_platforms):
-                        # print("Jogo ignorado por não estar em PC ou PlayStation.") # Log opcional
-                        continue
-                        
-                    link_element = await element.query_selector('a.game-card-compact__heading_with-link')
-                    title = await link_element.inner_text()
-                    url_suffix = await link_element.get_attribute('href')
-                    
-                    suggestions_list.append({
-                        'title': title, 
-                        'url': f"https://rawg.io{url_suffix}",
-                        'platforms': ', '.join(p.upper() for p in platforms),
-                        'metascore': metascore
-                    })
-                
-                except Exception as e:
-                    print(f"Erro ao extrair dados de um elemento: {e}")
-
-            await browser.close()
-            return suggestions_list[:limit]
-
-        except Exception as e:
-            print(f"Erro ao raspar a página de '{game_title}': {e}")
-            await browser.close()
+        await page.wait_for_selector('div.game-suggestions__items', timeout=60000)
+        # Segue assim que o primeiro card for renderizado, sem pausa fixa; se
+        # nenhum aparecer em pouco tempo, a lista de sugestões está vazia
+        if not await page.evaluate(WAIT_FOR_FIRST_CARD_JS, SCROLL_WAIT_TIMEOUT):
             return []
 
+        scroll = await page.evaluate(
+            AUTO_SCROLL_JS,
+            {'limit': limit, 'usableSelector': USABLE_CARD_SELECTOR, 'waitTimeout': SCROLL_WAIT_TIMEOUT}
+        )
+        print(f"Rolagem finalizada após {scroll['scrolls']} iterações. {scroll['count']} jogos aproveitáveis carregados.")
+
+        # Todos os cards são lidos de uma vez dentro do navegador, em vez de
+        # várias chamadas ao Playwright para cada card.
+        cards = await page.evaluate(EXTRACT_CARDS_JS, USABLE_CARD_SELECTOR)
+        suggestions_list = [tuple(card) for card in cards]
+
+        return suggestions_list[:limit]
+
+    except Exception as e:
+        print(f"Erro ao raspar a página de '{game_title}': {e}")
+        return []
+
+    finally:
+        await page.close()
+
 def get_google_sheets_client():
     """
     Cria um cliente gspread para interagir com o Google Sheets,
@@ -110,18 +263,142 @@ def get_google_sheets_client():
     if not credentials_json:
         raise ValueError("GOOGLE_CREDENTIALS not found in environment variables.")
         
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(
-        json.loads(credentials_json), 
-        ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
+    # google-auth (em vez do oauth2client, descontinuado); o cliente do gspread
+    # usa uma AuthorizedSession que mantém a conexão com as APIs do Google aberta
+    # entre as chamadas. O escopo do Drive é necessário para abrir a planilha pelo nome.
+    return gspread.service_account_from_dict(
+        json.loads(credentials_json),
+        scopes=['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
     )
-    return gspread.authorize(creds)
 
+# Os mesmos títulos são normalizados várias vezes (leitura das abas, chave do cache)
+@functools.lru_cache(maxsize=None)
 def normalize_game_name(name):
     """Converte o nome do jogo para minúsculas e remove caracteres especiais para comparação."""
     if not isinstance(name, str):
         return ""
-    name = name.strip().lower()
-    return re.sub(r"['\s:]", '', name)
+    # split() sem argumentos remove qualquer espaço Unicode (ex.: \xa0), como o \s do regex original
+    return ''.join(name.split()).lower().translate(_NORMALIZE_TABLE)
+
+def load_suggestions_cache():
+    """Lê o cache de sugestões do disco, ignorando entradas expiradas."""
+    try:
+        with open(SUGGESTIONS_CACHE_PATH, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    now = time.time()
+    return {
+        key: entry for key, entry in cache.items()
+        if now - entry['t'] < SUGGESTIONS_CACHE_TTL
+    }
+
+def save_suggestions_cache(cache):
+    """
+    Grava o cache de sugestões no disco. O arquivo é escrito ao lado e depois
+    trocado de uma vez, para que uma queda no meio não deixe o cache truncado.
+    """
+    temp_path = SUGGESTIONS_CACHE_PATH + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(temp_path, SUGGESTIONS_CACHE_PATH)
+
+def append_rows_to_sheet(target_sheet, rows_to_append):
+    """
+    Adiciona as linhas ao final da aba 'Jogos Similares', tentando de novo
+    com espera exponencial quando a cota de escrita do Sheets estoura (429).
+    Outros erros são repassados: append_rows não é idempotente, e as
+    sugestões já estão no cache para a próxima execução.
+    """
+    for attempt in range(SHEETS_MAX_RETRIES + 1):
+        try:
+            # RAW: os valores são gravados como texto, sem o Sheets tentar interpretar fórmulas
+            target_sheet.append_rows(rows_to_append, value_input_option='RAW')
+            break
+        except gspread.exceptions.APIError as e:
+            if e.response.status_code != 429 or attempt == SHEETS_MAX_RETRIES:
+                raise
+            delay = 2 ** attempt
+            print(f"Sheets respondeu {e.response.status_code}. Tentando gravar de novo em {delay}s...")
+            time.sleep(delay)
+
+    print(f"Dados salvos com sucesso. {len(rows_to_append)} linhas adicionadas.")
+
+async def scrape_and_save(games_to_scrape, target_sheet, scrape_game, cache, header=None):
+    """
+    Raspa os jogos em paralelo com a função scrape_game(título, slug) recebida e grava
+    os resultados na aba 'Jogos Similares' a cada lote de jogos.
+    Jogos presentes no cache não são buscados de novo. Se header for
+    informado (aba vazia), ele é gravado junto com o primeiro lote.
+    """
+    # As buscas são independentes e o tempo é gasto esperando a rede,
+    # então várias rodam em paralelo, limitadas pelo semáforo.
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
+
+    async def scrape_with_limit(game_title):
+        game_url_slug = build_rawg_slug(game_title)
+        if not game_url_slug:
+            # Evita abrir a página ou chamar a API para um slug que não pode existir
+            print(f"Não foi possível gerar um slug válido para '{game_title}'. Jogo ignorado.")
+            return []
+
+        cache_key = normalize_game_name(game_title)
+        if cache_key in cache:
+            print(f"Sugestões de '{game_title}' encontradas no cache.")
+            return cache[cache_key]['v']
+
+        async with semaphore:
+            suggestions = await scrape_game(game_title, game_url_slug)
+
+        if suggestions:
+            cache[cache_key] = {'t': time.time(), 'v': suggestions}
+        return suggestions
+
+    # Os resultados são gravados na planilha a cada lote de jogos:
+    # uma única chamada append_rows por lote em vez de uma por jogo,
+    # sem perder tudo o que já foi raspado se a execução cair no meio.
+    # A gravação roda numa thread enquanto o lote seguinte já é raspado;
+    # no máximo uma fica em andamento, para manter a ordem das linhas.
+    pending_write = None
+    try:
+        for start in range(0, len(games_to_scrape), FLUSH_EVERY_N_GAMES):
+            batch = games_to_scrape[start:start + FLUSH_EVERY_N_GAMES]
+            results = await asyncio.gather(
+                *(scrape_with_limit(game_title) for game_title in batch),
+                return_exceptions=True
+            )
+            # Ponto de recuperação: o cache vai para o disco antes da gravação na
+            # planilha, então se ela (ou o processo) falhar, a próxima execução
+            # reaproveita o que já foi raspado em vez de abrir as páginas de novo.
+            save_suggestions_cache(cache)
+
+            rows_to_append = []
+            for game_title, suggestions in zip(batch, results):
+                if isinstance(suggestions, Exception):
+                    print(f"Erro ao processar '{game_title}': {suggestions}")
+                elif suggestions:
+                    rows_to_append.extend((game_title, *suggestion) for suggestion in suggestions)
+                    print(f"'{game_title}': {len(suggestions)} jogos similares encontrados.")
+                else:
+                    print(f"Nenhum resultado de jogos similares encontrado para '{game_title}'.")
+
+            if rows_to_append:
+                if header:
+                    rows_to_append.insert(0, header)
+                    header = None
+                if pending_write:
+                    await pending_write
+                pending_write = asyncio.create_task(
+                    asyncio.to_thread(append_rows_to_sheet, target_sheet, rows_to_append)
+                )
+    finally:
+        if pending_write:
+            await pending_write
+
+    if header:
+        # Nenhum jogo teve resultados, mas a aba nova ainda precisa do cabeçalho
+        append_rows_to_sheet(target_sheet, [header])
 
 async def main():
     """
@@ -141,6 +418,8 @@ async def main():
         spreadsheet = client.open(spreadsheet_name)
         
         games_to_scrape = []
+        header_missing = False
+        target_empty = False
 
         if game_to_process_from_arg:
             # Se um jogo foi passado como argumento, essa é nossa lista de tarefas
@@ -148,25 +427,49 @@ async def main():
         else:
             # Lógica original: buscar todos os jogos pendentes na planilha
             print("Nenhum argumento recebido. Verificando todos os jogos pendentes na planilha...")
-            source_sheet = spreadsheet.worksheet("Jogos")
-            all_game_titles = [cell[0] for cell in source_sheet.get_all_values() if cell and cell[0] != '']
-            
+            # Só a coluna A de cada aba é necessária, além do cabeçalho da aba de
+            # destino; tudo vem na mesma requisição
+            try:
+                source_range, target_range, header_range = spreadsheet.values_batch_get(
+                    ["Jogos!A:A", "'Jogos Similares'!A:A", "'Jogos Similares'!A1:E1"]
+                )['valueRanges']
+                all_game_titles = [row[0] for row in source_range.get('values', []) if row and row[0]]
+                processed_titles_set = frozenset(map(
+                    normalize_game_name, (row[0] for row in target_range.get('values', []) if row)
+                ))
+                header_missing = not header_range.get('values')
+                target_empty = header_missing and not target_range.get('values')
+            except gspread.exceptions.APIError as e:
+                # A leitura em lote falha com 400 se a aba 'Jogos Similares' ainda não existe;
+                # nesse caso nenhum jogo foi processado e a aba é criada mais abaixo.
+                # Qualquer outro motivo é repassado: tratar a aba como vazia faria
+                # todos os jogos serem raspados e gravados de novo.
+                if e.response.status_code != 400:
+                    raise
+                try:
+                    spreadsheet.worksheet("Jogos Similares")
+                    target_missing = False
+                except gspread.exceptions.WorksheetNotFound:
+                    target_missing = True
+                if not target_missing:
+                    raise
+                source_sheet = spreadsheet.worksheet("Jogos")
+                all_game_titles = [title for title in source_sheet.col_values(1) if title]
+                processed_titles_set = frozenset()
+
             if not all_game_titles:
                 print("Nenhum título de jogo encontrado na planilha.")
                 return
 
-            try:
-                target_sheet = spreadsheet.worksheet("Jogos Similares")
-                processed_titles = [normalize_game_name(title) for title in target_sheet.col_values(1)]
-                processed_titles_set = set(processed_titles)
-            except gspread.exceptions.WorksheetNotFound:
-                print("Aba 'Jogos Similares' não encontrada. Criando...")
-                target_sheet = spreadsheet.add_worksheet(title="Jogos Similares", rows="100", cols="5")
-                target_sheet.update([['Jogo Base', 'Jogo Similar', 'Plataformas', 'Metascore', 'URL']], 'A1:E1')
-                processed_titles_set = set()
+            # Cada título é normalizado uma única vez; o dicionário mantém a ordem
+            # da planilha e descarta títulos repetidos.
+            normalized_to_title = {}
+            for title in all_game_titles:
+                normalized_to_title.setdefault(normalize_game_name(title), title)
 
             games_to_scrape = [
-                title for title in all_game_titles if normalize_game_name(title) not in processed_titles_set
+                title for normalized, title in normalized_to_title.items()
+                if normalized not in processed_titles_set
             ]
 
         if not games_to_scrape:
@@ -181,26 +484,89 @@ async def main():
         except gspread.exceptions.WorksheetNotFound:
             print("Aba 'Jogos Similares' não encontrada. Criando...")
             target_sheet = spreadsheet.add_worksheet(title="Jogos Similares", rows="100", cols="5")
-            target_sheet.update([['Jogo Base', 'Jogo Similar', 'Plataformas', 'Metascore', 'URL']], 'A1:E1')
+            target_empty = True
 
-        for game_title in games_to_scrape:
-            suggestions = await scrape_rawg_suggestions(game_title)
-            
-            if suggestions:
-                rows_to_append = []
-                for suggestion in suggestions:
-                    rows_to_append.append([
-                        game_title,
-                        suggestion['title'],
-                        suggestion['platforms'],
-                        suggestion['metascore'],
-                        suggestion['url']
-                    ])
-                
-                target_sheet.append_rows(rows_to_append)
-                print(f"Dados de '{game_title}' salvos com sucesso. {len(rows_to_append)} linhas adicionadas.")
-            else:
-                print(f"Nenhum resultado de jogos similares encontrado para '{game_title}'.")
+        # Numa aba vazia o cabeçalho vai junto com o primeiro lote de linhas,
+        # na mesma chamada; só se a aba já tiver dados sem cabeçalho ele é
+        # gravado à parte, direto na primeira linha.
+        pending_header = SIMILAR_GAMES_HEADER if target_empty else None
+        if header_missing and not target_empty:
+            target_sheet.update([SIMILAR_GAMES_HEADER], 'A1:E1')
+
+        # O cache é gravado mesmo se a execução falhar no meio, para que as
+        # sugestões já buscadas não precisem ser buscadas de novo.
+        cache = load_suggestions_cache()
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                # Um único navegador e contexto para todos os jogos: o custo de
+                # iniciar o Chromium é pago uma só vez e a conexão com o rawg.io
+                # é reaproveitada entre as páginas. Ele só é iniciado quando a
+                # primeira página precisa ser aberta.
+                # Se a inicialização falhar (ex.: perfil restaurado corrompido), o erro
+                # é guardado e repassado aos próximos jogos, sem tentar de novo.
+                browser_lock = asyncio.Lock()
+                browser_context = None
+                browser_launch_error = None
+
+                async def get_browser_context():
+                    nonlocal browser_context, browser_launch_error
+                    async with browser_lock:
+                        if browser_launch_error:
+                            raise browser_launch_error
+                        if browser_context is None:
+                            from playwright.async_api import async_playwright
+
+                            p = await async_playwright().start()
+                            try:
+                                browser_context = await p.chromium.launch_persistent_context(
+                                    BROWSER_PROFILE_DIR,
+                                    headless=True,
+                                    user_agent=USER_AGENT,
+                                    viewport=BROWSER_VIEWPORT,
+                                    args=BROWSER_ARGS
+                                )
+                            except Exception as e:
+                                browser_launch_error = e
+                                await p.stop()
+                                raise
+                            # Encerrados em ordem inversa: primeiro o contexto, depois o Playwright
+                            stack.push_async_callback(p.stop)
+                            stack.push_async_callback(browser_context.close)
+                    return browser_context
+
+                async def scrape_with_browser(game_title, game_url_slug):
+                    return await scrape_rawg_suggestions(await get_browser_context(), game_title, game_url_slug)
+
+                rawg_api_key = os.environ.get('RAWG_API_KEY')
+                if rawg_api_key:
+                    # Com uma chave da API, as sugestões vêm prontas em JSON e o
+                    # navegador só é usado para os jogos que a API não atender.
+                    print("RAWG_API_KEY encontrada. Usando a API JSON do RAWG.")
+                    # Importado só aqui: quem usa a API não paga a importação do Playwright, e vice-versa
+                    import httpx
+
+                    # HTTP/2 multiplexa as requisições paralelas numa única conexão TLS
+                    http_client = await stack.enter_async_context(httpx.AsyncClient(
+                        http2=True,
+                        params={'key': rawg_api_key},
+                        headers={'User-Agent': USER_AGENT},
+                        timeout=10.0,
+                        limits=httpx.Limits(max_keepalive_connections=MAX_CONCURRENT_SCRAPES)
+                    ))
+
+                    async def scrape_game(game_title, game_url_slug):
+                        try:
+                            return await fetch_rawg_api_suggestions(http_client, game_title, game_url_slug)
+                        except httpx.HTTPError as e:
+                            print(f"Erro ao consultar a API do RAWG para '{game_title}': {e}")
+                            print(f"Buscando '{game_title}' pelo navegador.")
+                            return await scrape_with_browser(game_title, game_url_slug)
+                else:
+                    scrape_game = scrape_with_browser
+
+                await scrape_and_save(games_to_scrape, target_sheet, scrape_game, cache, pending_header)
+        finally:
+            save_suggestions_cache(cache)
 
     except Exception as e:
         print(f"Ocorreu um erro fatal: {e}")